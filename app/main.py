@@ -1,25 +1,44 @@
-import html
 import logging
+import math
+import os
+import re
+import time
 from enum import Enum
-from typing import Dict, List, Optional
-from uuid import uuid4
+from functools import lru_cache
+from itertools import count
+from secrets import token_hex
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
 
+import orjson
+import redis.asyncio as aioredis
 from fastapi import Depends, FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator
-from slowapi import Limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
-
-logging.basicConfig(level=logging.INFO)
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+APP_ENV = os.getenv("APP_ENV", "dev")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").upper()
+# shared rate-limit storage for multi-worker deployments; in-process if unset
+REDIS_URL = os.getenv("REDIS_URL")
+
+
+def _resolve_log_level(name: str) -> int:
+    # uvicorn's "trace" has no stdlib equivalent; anything unknown falls back to INFO
+    level = logging.getLevelName("DEBUG" if name == "TRACE" else name)
+    return level if isinstance(level, int) else logging.INFO
+
+
+logging.basicConfig(level=_resolve_log_level(LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
-limiter = Limiter(key_func=get_remote_address)
 app = FastAPI(
     title="SecDev Course App",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
+    # no OpenAPI schema (and hence no /docs, /redoc) in production
+    openapi_url=None if APP_ENV == "prod" else "/openapi.json",
 )
 
 
@@ -32,34 +51,233 @@ async def add_security_headers(request: Request, call_next):
     return response
 
 
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+class UserIdMiddleware:
+    """Pull X-User-ID out of the raw ASGI headers into scope["user_id"].
+
+    Saves building Starlette's case-insensitive Headers mapping just to
+    read a single header in get_current_user_id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"x-user-id":
+                    scope["user_id"] = value.decode("latin-1")
+                    break
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(UserIdMiddleware)
 
 
 # --- ADR-002: RFC 7807 ---
 class AppException(Exception):
+    __slots__ = ("status_code", "title", "detail")
+
     def __init__(self, status_code: int, title: str, detail: str):
         self.status_code = status_code
         self.title = title
         self.detail = detail
 
 
-# helper for generating rfc 7807 answers
-def problem_json_response(status_code: int, title: str, detail: str, type_url: str = "about:blank"):
-    correlation_id = str(uuid4())
-    logger.error(
-        f"Error {correlation_id}: status={status_code}, " f"title='{title}', detail='{detail}'"
+# --- ADR-003: rate limiting ---
+class RateLimitExceeded(Exception):
+    __slots__ = ("detail", "headers")
+
+    def __init__(self, detail: str, retry_after: int):
+        self.detail = detail
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+_RATE_SPEC_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+_PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def _parse_rate_spec(spec: str) -> Tuple[int, int]:
+    """Parse a limit like "5/30second" or "10/minute" into (capacity, period_seconds)."""
+    match = _RATE_SPEC_RE.match(spec)
+    if not match:
+        raise ValueError(f"Invalid rate limit spec: {spec!r}")
+    capacity, multiplier, unit = match.groups()
+    return int(capacity), int(multiplier or 1) * _PERIOD_SECONDS[unit]
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "ts")
+
+    def __init__(self, tokens: float, ts: float):
+        self.tokens = tokens
+        self.ts = ts
+
+
+class RateLimit:
+    """Per-client token bucket, used as a route dependency.
+
+    Buckets live in process memory and are refilled lazily on each check,
+    so no background task or lock is needed on a single event loop. Buckets
+    that have refilled to capacity are indistinguishable from new ones and
+    are swept out at most once per period, which bounds memory under floods
+    from many addresses.
+    """
+
+    def __init__(self, spec: str):
+        # the spec is parsed once here, never on the request path
+        capacity, period = _parse_rate_spec(spec)
+        self.capacity = float(capacity)
+        self.refill_per_sec = capacity / period
+        # built once so the 429 path does no string formatting
+        self.detail = f"Rate limit exceeded: {capacity} per {period} second"
+        self.period = period
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._next_sweep = time.monotonic() + period
+
+    async def __call__(self, request: Request) -> None:
+        key = request.client.host if request.client else "127.0.0.1"
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.capacity, now)
+        else:
+            bucket.tokens = min(
+                self.capacity, bucket.tokens + (now - bucket.ts) * self.refill_per_sec
+            )
+            bucket.ts = now
+
+        if bucket.tokens < 1:
+            retry_after = math.ceil((1 - bucket.tokens) / self.refill_per_sec)
+            raise RateLimitExceeded(self.detail, retry_after)
+        bucket.tokens -= 1
+
+    def _sweep(self, now: float) -> None:
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if bucket.tokens + (now - bucket.ts) * self.refill_per_sec < self.capacity
+        }
+        self._next_sweep = now + self.period
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+
+# Refill and take a token atomically. Uses the Redis clock so all workers
+# agree on "now"; returns {allowed, tokens_left}.
+_TOKEN_BUCKET_LUA = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) + tonumber(now_t[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+local left = string.format('%.6f', tokens)
+redis.call('HSET', KEYS[1], 'tokens', left, 'ts', string.format('%.6f', now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {allowed, left}
+"""
+
+
+class RedisRateLimit(RateLimit):
+    """Token bucket kept in Redis, so the limit holds across all workers.
+
+    Fails open: if Redis is down or slow, the request is let through and a
+    warning is logged, so a storage outage does not take the API down too.
+    """
+
+    def __init__(self, spec: str, client: aioredis.Redis):
+        super().__init__(spec)
+        # register_script runs EVALSHA and loads the script on first NOSCRIPT
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+        # an idle bucket is full again after this long, so it can be dropped
+        self._ttl = math.ceil(self.capacity / self.refill_per_sec)
+
+    async def __call__(self, request: Request) -> None:
+        host = request.client.host if request.client else "127.0.0.1"
+        key = f"rate_limit:{request.method}:{request.scope['route'].path}:{host}"
+        try:
+            allowed, tokens = await self._script(
+                keys=[key], args=[self.capacity, self.refill_per_sec, self._ttl]
+            )
+        except RedisError as exc:
+            logger.warning("Rate limit storage unavailable, request not limited: %s", exc)
+            return
+        if not allowed:
+            retry_after = math.ceil((1 - float(tokens)) / self.refill_per_sec)
+            raise RateLimitExceeded(self.detail, retry_after)
+
+
+# bounded so an unresponsive Redis adds at most this much latency per request
+_REDIS_TIMEOUT_SECONDS = 0.5
+_redis = (
+    aioredis.from_url(
+        REDIS_URL,
+        socket_timeout=_REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=_REDIS_TIMEOUT_SECONDS,
     )
-    return JSONResponse(
-        status_code=status_code,
-        content={
+    if REDIS_URL
+    else None
+)
+
+
+def _rate_limit(spec: str) -> RateLimit:
+    if _redis is None:
+        return RateLimit(spec)
+    return RedisRateLimit(spec, _redis)
+
+
+# /health backs the container HEALTHCHECK, so it never depends on Redis
+rate_limit_health = RateLimit("5/30second")
+rate_limit_create = _rate_limit("5/30second")
+rate_limit_delete = _rate_limit("10/minute")
+rate_limit_update = _rate_limit("10/minute")
+RATE_LIMITS: Tuple[RateLimit, ...] = (
+    rate_limit_health,
+    rate_limit_create,
+    rate_limit_delete,
+    rate_limit_update,
+)
+
+
+_RATE_LIMIT_TITLE = "Rate Limit Exceeded"
+
+
+@lru_cache(maxsize=256)
+def _problem_json_prefix(status_code: int, title: str, detail: str, type_url: str) -> bytes:
+    """Encoded problem body up to the opening quote of the correlation_id value."""
+    body = orjson.dumps(
+        {
             "type": type_url,
             "title": title,
             "status": status_code,
             "detail": detail,
-            "correlation_id": correlation_id,
-        },
+            "correlation_id": "",
+        }
     )
+    return body[: -len(b'"}')]
+
+
+# helper for generating rfc 7807 answers
+def problem_json_response(status_code: int, title: str, detail: str, type_url: str = "about:blank"):
+    correlation_id = token_hex(16)
+    logger.error(
+        "Error %s: status=%d, title='%s', detail='%s'", correlation_id, status_code, title, detail
+    )
+    # only the correlation id changes between responses, the rest is cached
+    content = (
+        _problem_json_prefix(status_code, title, detail, type_url) + correlation_id.encode() + b'"}'
+    )
+    return Response(content=content, status_code=status_code, media_type="application/json")
 
 
 @app.exception_handler(AppException)
@@ -80,12 +298,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(RateLimitExceeded)
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
     response = problem_json_response(
-        status.HTTP_429_TOO_MANY_REQUESTS,
-        "Rate Limit Exceeded",
-        f"Rate limit exceeded: {exc.detail}",
+        status.HTTP_429_TOO_MANY_REQUESTS, _RATE_LIMIT_TITLE, exc.detail
     )
-    if exc.headers:
-        response.headers.update(exc.headers)
+    response.headers.update(exc.headers)
     return response
 
 
@@ -108,6 +323,19 @@ class CardColumn(str, Enum):
 
 
 # ADR-001: input data validation
+# same replacements as html.escape(value, quote=True), applied in a single pass
+_ESCAPE_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+_ESCAPE_CHARS_RE = re.compile(r"[&<>\"']")
+
+
+def _escape_title(value: str) -> str:
+    if _ESCAPE_CHARS_RE.search(value) is None:
+        return value
+    return value.translate(_ESCAPE_TABLE)
+
+
 class CardCreate(BaseModel):
     title: str = Field(min_length=3, max_length=255)
     column: CardColumn
@@ -115,7 +343,7 @@ class CardCreate(BaseModel):
     @field_validator("title")
     @classmethod
     def sanitize(cls, value: str) -> str:
-        return html.escape(value)
+        return _escape_title(value)
 
 
 class CardUpdate(BaseModel):
@@ -126,7 +354,7 @@ class CardUpdate(BaseModel):
     @classmethod
     def sanitize(cls, value: str) -> str:
         if value is not None:
-            return html.escape(value)
+            return _escape_title(value)
         return value
 
 
@@ -137,14 +365,84 @@ class Card(BaseModel):
     owner_id: str
 
 
+# Card bodies are decoded and validated straight from the raw request bytes by
+# pydantic-core in one pass, instead of json.loads() followed by validation.
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _is_json_content_type(content_type: Optional[str]) -> bool:
+    # same rule as FastAPI: no Content-Type, application/json or application/*+json
+    if not content_type:
+        return True
+    maintype, _, subtype = content_type.partition(";")[0].strip().lower().partition("/")
+    return maintype == "application" and (subtype == "json" or subtype.endswith("+json"))
+
+
+async def _validate_json_body(model: Type[ModelT], request: Request) -> ModelT:
+    # rejecting other types keeps CSRF-style "simple" requests (text/plain, forms) out
+    if not _is_json_content_type(request.headers.get("content-type")):
+        raise RequestValidationError(
+            [{"type": "model_attributes_type", "loc": ("body",), "msg": "Expected JSON body"}]
+        )
+    body = await request.body()
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False)) from None
+
+
+_OPENAPI_REF_TEMPLATE = "#/components/schemas/{model}"
+# bodies validated by hand are invisible to FastAPI, so their schemas are added here
+_OPENAPI_BODY_MODELS: Tuple[Type[BaseModel], ...] = (CardCreate, CardUpdate)
+
+
+def _json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    schema = {"$ref": _OPENAPI_REF_TEMPLATE.format(model=model.__name__)}
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+
+_default_openapi = app.openapi
+
+
+def _openapi_with_body_models() -> Dict[str, Any]:
+    if app.openapi_schema:
+        return app.openapi_schema
+    openapi_schema = _default_openapi()
+    components = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+    for model in _OPENAPI_BODY_MODELS:
+        schema = model.model_json_schema(ref_template=_OPENAPI_REF_TEMPLATE)
+        for name, definition in schema.pop("$defs", {}).items():
+            components.setdefault(name, definition)
+        components[model.__name__] = schema
+    return openapi_schema
+
+
+app.openapi = _openapi_with_body_models  # type: ignore[method-assign]
+
+
+async def card_create_body(request: Request) -> CardCreate:
+    return await _validate_json_body(CardCreate, request)
+
+
+async def card_update_body(request: Request) -> CardUpdate:
+    return await _validate_json_body(CardUpdate, request)
+
+
 # --- db ---
 
-_DB_CARDS: Dict[int, Card] = {}
-_next_card_id = 1
+# cards are stored as plain dicts in the shape of Card; input is validated by
+# CardCreate/CardUpdate, so they are not re-validated on the way in or out
+_DB_CARDS: Dict[int, Dict[str, Any]] = {}
+# secondary index: owner_id -> {card_id: card}, kept in sync on create/delete
+_DB_CARDS_BY_OWNER: Dict[str, Dict[int, Dict[str, Any]]] = {}
+# pre-serialized JSON of each card, refreshed on every write
+_DB_CARDS_JSON: Dict[int, bytes] = {}
+# ids are never reused, even after a card is deleted
+_next_card_id = count(1).__next__
 
 
-def get_current_user_id(request: Request) -> str:
-    user_id = request.headers.get("X-User-ID")
+async def get_current_user_id(request: Request) -> str:
+    user_id: Optional[str] = request.scope.get("user_id")
     if not user_id:
         raise AppException(
             status.HTTP_401_UNAUTHORIZED,
@@ -157,38 +455,55 @@ def get_current_user_id(request: Request) -> str:
 # --- api ---
 
 
-@app.get("/health")
-@limiter.limit("5/30second")
-def health(request: Request):
+@app.get("/health", dependencies=[Depends(rate_limit_health)])
+async def health(request: Request):
     return {"status": "ok"}
 
 
-@app.post("/cards", response_model=Card, status_code=status.HTTP_201_CREATED)
-@limiter.limit("5/30second")  # ADR-003: Rate Limiting
-def create_card(
-    card_in: CardCreate, request: Request, owner_id: str = Depends(get_current_user_id)
+@app.post(
+    "/cards",
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_201_CREATED: {"model": Card}},
+    dependencies=[Depends(rate_limit_create)],  # ADR-003: Rate Limiting
+    openapi_extra=_json_body_openapi(CardCreate),
+)
+async def create_card(
+    request: Request,
+    # authenticate before the body is parsed, so anonymous callers get no validation feedback
+    owner_id: str = Depends(get_current_user_id),
+    card_in: CardCreate = Depends(card_create_body),
 ):
-    global _next_card_id
-    new_card = Card(id=_next_card_id, owner_id=owner_id, **card_in.model_dump())
-    _DB_CARDS[_next_card_id] = new_card
-    _next_card_id += 1
-    return new_card
+    card_id = _next_card_id()
+    card = {
+        "id": card_id,
+        "title": card_in.title,
+        "column": card_in.column.value,
+        "owner_id": owner_id,
+    }
+    _DB_CARDS[card_id] = card
+    _DB_CARDS_BY_OWNER.setdefault(owner_id, {})[card_id] = card
+    _DB_CARDS_JSON[card_id] = orjson.dumps(card)
+    return card
 
 
 @app.get("/cards", response_model=List[Card])
-def get_cards_list(request: Request, owner_id: str = Depends(get_current_user_id)):
-    return [card for card in _DB_CARDS.values() if card.owner_id == owner_id]
+async def get_cards_list(request: Request, owner_id: str = Depends(get_current_user_id)):
+    owner_cards = _DB_CARDS_BY_OWNER.get(owner_id, {})
+    content = b"[" + b",".join([_DB_CARDS_JSON[card_id] for card_id in owner_cards]) + b"]"
+    return Response(content=content, media_type="application/json")
 
 
 @app.get("/cards/{card_id}", response_model=Card)
-def get_card_by_id(request: Request, card_id: int, owner_id: str = Depends(get_current_user_id)):
+async def get_card_by_id(
+    request: Request, card_id: int, owner_id: str = Depends(get_current_user_id)
+):
     card = _DB_CARDS.get(card_id)
     if not card:
         raise AppException(
             status.HTTP_404_NOT_FOUND, "Not Found", f"Card with id={card_id} not found."
         )
 
-    if card.owner_id != owner_id:
+    if card["owner_id"] != owner_id:
         raise AppException(
             status.HTTP_403_FORBIDDEN,
             "Access Denied",
@@ -197,16 +512,19 @@ def get_card_by_id(request: Request, card_id: int, owner_id: str = Depends(get_c
     return card
 
 
-@app.delete("/cards/{card_id}", status_code=status.HTTP_204_NO_CONTENT)
-@limiter.limit("10/minute")
-def delete_card(request: Request, card_id: int, owner_id: str = Depends(get_current_user_id)):
+@app.delete(
+    "/cards/{card_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(rate_limit_delete)],
+)
+async def delete_card(request: Request, card_id: int, owner_id: str = Depends(get_current_user_id)):
     card = _DB_CARDS.get(card_id)
     if not card:
         raise AppException(
             status.HTTP_404_NOT_FOUND, "Not Found", f"Card with id={card_id} not found."
         )
 
-    if card.owner_id != owner_id:
+    if card["owner_id"] != owner_id:
         raise AppException(
             status.HTTP_403_FORBIDDEN,
             "Access Denied",
@@ -214,15 +532,21 @@ def delete_card(request: Request, card_id: int, owner_id: str = Depends(get_curr
         )
 
     del _DB_CARDS[card_id]
+    _DB_CARDS_BY_OWNER[owner_id].pop(card_id, None)
+    del _DB_CARDS_JSON[card_id]
 
 
-@app.patch("/cards/{card_id}", response_model=Card)
-@limiter.limit("10/minute")
-def update_card(
+@app.patch(
+    "/cards/{card_id}",
+    response_model=Card,
+    dependencies=[Depends(rate_limit_update)],
+    openapi_extra=_json_body_openapi(CardUpdate),
+)
+async def update_card(
     request: Request,
     card_id: int,
-    card_in: CardUpdate,
     owner_id: str = Depends(get_current_user_id),
+    card_in: CardUpdate = Depends(card_update_body),
 ):
     card = _DB_CARDS.get(card_id)
     if not card:
@@ -230,16 +554,18 @@ def update_card(
             status.HTTP_404_NOT_FOUND, "Not Found", f"Card with id={card_id} not found."
         )
 
-    if card.owner_id != owner_id:
+    if card["owner_id"] != owner_id:
         raise AppException(
             status.HTTP_403_FORBIDDEN,
             "Access Denied",
             "You do not have permission to update this card.",
         )
 
-    update_data = card_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(card, field, value)
+    fields_set = card_in.model_fields_set
+    if "title" in fields_set:
+        card["title"] = card_in.title
+    if "column" in fields_set and card_in.column is not None:
+        card["column"] = card_in.column.value
 
-    _DB_CARDS[card_id] = card
+    _DB_CARDS_JSON[card_id] = orjson.dumps(card)
     return card
@@ -0,0 +1,21 @@
+"""Gunicorn settings for running app.main:app under Uvicorn workers.
+
+Usage: gunicorn -c gunicorn_conf.py app.main:app
+"""
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8080")
+
+# A single worker by default: cards, their ids and caches live in process
+# memory, so several workers would each keep a separate store. Raise
+# WEB_CONCURRENCY (e.g. to 2 * cores + 1) only once cards are in shared storage.
+# Rate-limit buckets are shared through Redis when REDIS_URL is set and are
+# per worker otherwise.
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+# picks up uvloop and httptools automatically when they are installed
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = 5
+
+# the container root filesystem is read-only, keep worker heartbeats in memory
+worker_tmp_dir = "/dev/shm"
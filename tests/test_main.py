@@ -1,9 +1,21 @@
+import json
+import logging
+import re
 import time
 
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import _DB_CARDS, app
+from app.main import (
+    _DB_CARDS,
+    _DB_CARDS_BY_OWNER,
+    _DB_CARDS_JSON,
+    RATE_LIMITS,
+    CardCreate,
+    RateLimit,
+    _resolve_log_level,
+    app,
+)
 
 client = TestClient(app)
 
@@ -18,6 +30,10 @@ def client1() -> TestClient:
 def run_around_tests():
     global _next_card_id
     _DB_CARDS.clear()
+    _DB_CARDS_BY_OWNER.clear()
+    _DB_CARDS_JSON.clear()
+    for rate_limit in RATE_LIMITS:
+        rate_limit.reset()
     _next_card_id = 1
     yield
     app.dependency_overrides.clear()
@@ -65,6 +81,27 @@ def test_create_card_max_title_length_succeeds(client1: TestClient):
     assert response.json()["title"] == max_length_title
 
 
+def test_get_cards_list_returns_only_own_cards(client1: TestClient):
+    for title, user in (("First card", "user-1"), ("Second card", "user-2")):
+        client1.post("/cards", json={"title": title, "column": "todo"}, headers={"X-User-ID": user})
+
+    response = client1.get("/cards", headers={"X-User-ID": "user-1"})
+    assert response.status_code == 200
+    assert [card["title"] for card in response.json()] == ["First card"]
+
+
+def test_deleted_card_is_removed_from_list(client1: TestClient):
+    card_id = client1.post(
+        "/cards", json={"title": "Short-lived", "column": "done"}, headers={"X-User-ID": "user-1"}
+    ).json()["id"]
+
+    response_delete = client1.delete(f"/cards/{card_id}", headers={"X-User-ID": "user-1"})
+    assert response_delete.status_code == 204
+
+    response = client1.get("/cards", headers={"X-User-ID": "user-1"})
+    assert response.json() == []
+
+
 # negative tests (p06)
 
 
@@ -92,6 +129,40 @@ def test_create_card_invalid_column_fails_with_rfc7807(client1: TestClient):
     )
 
 
+def test_create_card_malformed_json_fails_with_rfc7807(client1: TestClient):
+    response = client1.post(
+        "/cards",
+        content=b'{"title": "Broken",',
+        headers={"X-User-ID": "user-1", "Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert_rfc7807_problem_detail(
+        response.json(), expected_status=422, expected_title="Validation Error"
+    )
+
+
+def test_create_card_non_json_content_type_fails_with_rfc7807(client1: TestClient):
+    response = client1.post(
+        "/cards",
+        content=b'{"title": "Sneaky card", "column": "todo"}',
+        headers={"X-User-ID": "user-1", "Content-Type": "text/plain"},
+    )
+    assert response.status_code == 422
+    assert_rfc7807_problem_detail(
+        response.json(), expected_status=422, expected_title="Validation Error"
+    )
+    assert _DB_CARDS == {}
+
+
+def test_create_card_accepts_json_suffix_content_type(client1: TestClient):
+    response = client1.post(
+        "/cards",
+        content=b'{"title": "Vendor JSON", "column": "todo"}',
+        headers={"X-User-ID": "user-1", "Content-Type": "application/vnd.api+json; charset=utf-8"},
+    )
+    assert response.status_code == 201
+
+
 def test_get_another_users_card_fails(client1: TestClient):
     response_create = client1.post(
         "/cards",
@@ -108,6 +179,22 @@ def test_get_another_users_card_fails(client1: TestClient):
     )
 
 
+def test_missing_user_id_header_fails(client1: TestClient):
+    response = client1.get("/cards")
+    assert response.status_code == 401
+    assert_rfc7807_problem_detail(
+        response.json(), expected_status=401, expected_title="Authentication Error"
+    )
+
+
+def test_create_card_without_user_id_fails_before_validation(client1: TestClient):
+    response = client1.post("/cards", json={"title": "ab", "column": "invalid-column"})
+    assert response.status_code == 401
+    assert_rfc7807_problem_detail(
+        response.json(), expected_status=401, expected_title="Authentication Error"
+    )
+
+
 def test_get_non_existent_card_fails(client1: TestClient):
     response = client1.get("/cards/999", headers={"X-User-ID": "user-1"})
     assert response.status_code == 404
@@ -127,11 +214,22 @@ def test_rate_limit_blocks_flood_requests(client1: TestClient):
 
     response = client1.post("/cards", json=json_payload, headers=headers)
     assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
     assert_rfc7807_problem_detail(
         response.json(), expected_status=429, expected_title="Rate Limit Exceeded"
     )
 
 
+def test_rate_limit_spec_is_parsed_once():
+    rate_limit = RateLimit("10/minute")
+    assert rate_limit.capacity == 10
+    assert rate_limit.refill_per_sec == 10 / 60
+    assert rate_limit.detail == "Rate limit exceeded: 10 per 60 second"
+
+    with pytest.raises(ValueError):
+        RateLimit("ten per minute")
+
+
 def test_create_card_with_xss_payload_is_sanitized(client1: TestClient):
     # аналогично
     time.sleep(31)
@@ -148,7 +246,15 @@ def test_create_card_with_xss_payload_is_sanitized(client1: TestClient):
     assert response.status_code == 201
     data = response.json()
     assert data["title"] == escaped_payload
-    assert _DB_CARDS[data["id"]].title == escaped_payload
+    assert _DB_CARDS[data["id"]]["title"] == escaped_payload
+
+
+def test_card_title_escaping_matches_html_escape():
+    card = CardCreate(title="\"Tom\" & 'Jerry' <3", column="todo")
+    assert card.title == "&quot;Tom&quot; &amp; &#x27;Jerry&#x27; &lt;3"
+
+    plain = CardCreate(title="Nothing to escape", column="todo")
+    assert plain.title == "Nothing to escape"
 
 
 def test_update_card_success(client1: TestClient):
@@ -170,6 +276,24 @@ def test_update_card_success(client1: TestClient):
     assert data["title"] == "Updated Title"
     assert data["column"] == "done"
 
+    response_list = client1.get("/cards", headers={"X-User-ID": "user-1"})
+    assert response_list.json() == [data]
+
+
+def test_update_card_keeps_unset_column(client1: TestClient):
+    card_id = client1.post(
+        "/cards",
+        json={"title": "Original Title", "column": "in-progress"},
+        headers={"X-User-ID": "user-1"},
+    ).json()["id"]
+
+    response_update = client1.patch(
+        f"/cards/{card_id}", json={"title": "Renamed"}, headers={"X-User-ID": "user-1"}
+    )
+
+    assert response_update.status_code == 200
+    assert response_update.json()["column"] == "in-progress"
+
 
 def test_update_another_users_card_fails(client1: TestClient):
     response_create = client1.post(
@@ -186,3 +310,23 @@ def test_update_another_users_card_fails(client1: TestClient):
     )
 
     assert response_update.status_code == 403
+
+
+def test_openapi_card_body_schemas_are_components(client1: TestClient):
+    schema = client1.get("/openapi.json").json()
+    components = schema["components"]["schemas"]
+    assert {"CardCreate", "CardUpdate", "CardColumn"} <= components.keys()
+
+    create_body = schema["paths"]["/cards"]["post"]["requestBody"]
+    assert create_body["content"]["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/CardCreate"
+    }
+
+    refs = re.findall(r'"\$ref":\s*"#/components/schemas/([^"]+)"', json.dumps(schema))
+    assert set(refs) <= components.keys()
+
+
+def test_unknown_log_level_falls_back_to_info():
+    assert _resolve_log_level("WARNING") == logging.WARNING
+    assert _resolve_log_level("TRACE") == logging.DEBUG
+    assert _resolve_log_level("VERBOSE") == logging.INFO
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from starlette.requests import Request
+
+from app.main import RateLimit, RateLimitExceeded, RedisRateLimit
+
+KEY = "rate_limit:POST:/cards:10.0.0.1"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis()
+
+
+def make_request(host: str = "10.0.0.1") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/cards",
+            "headers": [],
+            "client": (host, 50000),
+            "route": SimpleNamespace(path="/cards"),
+        }
+    )
+
+
+@pytest.mark.anyio
+async def test_redis_bucket_allows_burst_then_blocks(redis_client):
+    rate_limit = RedisRateLimit("5/30second", redis_client)
+
+    for _ in range(5):
+        await rate_limit(make_request())
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        await rate_limit(make_request())
+    assert exc_info.value.headers == {"Retry-After": "6"}
+    assert await redis_client.ttl(KEY) == 30
+
+
+@pytest.mark.anyio
+async def test_redis_bucket_is_per_client(redis_client):
+    rate_limit = RedisRateLimit("1/minute", redis_client)
+
+    await rate_limit(make_request("10.0.0.1"))
+    await rate_limit(make_request("10.0.0.2"))
+
+    with pytest.raises(RateLimitExceeded):
+        await rate_limit(make_request("10.0.0.1"))
+
+
+@pytest.mark.anyio
+async def test_redis_bucket_refills_over_time(redis_client):
+    rate_limit = RedisRateLimit("1/minute", redis_client)
+    await rate_limit(make_request())
+
+    # pretend the last refill happened a minute ago
+    last_refill = float(await redis_client.hget(KEY, "ts"))
+    await redis_client.hset(KEY, "ts", f"{last_refill - 60:.6f}")
+
+    await rate_limit(make_request())
+
+
+@pytest.mark.anyio
+async def test_redis_outage_fails_open():
+    rate_limit = RedisRateLimit("1/minute", fakeredis.FakeAsyncRedis(connected=False))
+
+    for _ in range(3):
+        await rate_limit(make_request())
+
+
+@pytest.mark.anyio
+async def test_in_process_buckets_are_swept_once_refilled(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("app.main.time.monotonic", lambda: now)
+    rate_limit = RateLimit("5/30second")
+
+    await rate_limit(make_request("10.0.0.1"))
+    now += 25
+    for _ in range(5):
+        await rate_limit(make_request("10.0.0.2"))
+
+    # first sweep is due one period after creation: 10.0.0.1 has refilled,
+    # 10.0.0.2 has only regained part of its burst
+    now += 5
+    await rate_limit(make_request("10.0.0.3"))
+    assert set(rate_limit._buckets) == {"10.0.0.2", "10.0.0.3"}